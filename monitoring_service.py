@@ -1,19 +1,47 @@
+import array
+import asyncio
+import functools
+import heapq
+import http.client
+import itertools
 import json
+import math
 import os
+import queue
 import re
+import select
+import signal
+import socket
+import struct
 import sys
 import threading
 import time
+import urllib.parse
+import urllib.request
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from subprocess import CalledProcessError, run
-from typing import Callable, Dict, List, Optional, Protocol
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Protocol, Set, Tuple
 
 
-@dataclass
+_EPOCH = datetime(1970, 1, 1)
+
+
+def ns_to_datetime(timestamp_ns: int) -> datetime:
+    """Convert a ``time.time_ns()`` value to a naive UTC datetime (as ``utcnow()`` returns)."""
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+
+# Sample types use __slots__ where dataclasses support it (Python 3.10+): smaller
+# instances and faster attribute access for the many samples a session creates.
+_SAMPLE_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SAMPLE_DATACLASS_OPTIONS)
 class PingSample:
-    timestamp: datetime
+    timestamp: int  # nanoseconds since the Unix epoch (UTC), see ``ns_to_datetime``
     target: str
     latency_ms: Optional[float]
     success: bool
@@ -21,7 +49,7 @@ class PingSample:
     error: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SAMPLE_DATACLASS_OPTIONS)
 class SpeedSample:
     timestamp: datetime
     direction: str  # "download" or "upload"
@@ -31,7 +59,7 @@ class SpeedSample:
     error: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SAMPLE_DATACLASS_OPTIONS)
 class OutageEvent:
     start: datetime
     end: Optional[datetime] = None
@@ -39,13 +67,26 @@ class OutageEvent:
 
 
 def serialize_ping(sample: PingSample) -> Dict[str, object]:
+    return _ping_record(
+        sample.timestamp, sample.target, sample.latency_ms, sample.success, sample.timeout, sample.error
+    )
+
+
+def _ping_record(
+    timestamp_ns: int,
+    target: str,
+    latency_ms: Optional[float],
+    success: bool,
+    timeout: bool,
+    error: Optional[str],
+) -> Dict[str, object]:
     return {
-        "timestamp": sample.timestamp.isoformat(),
-        "target": sample.target,
-        "latency_ms": sample.latency_ms,
-        "success": sample.success,
-        "timeout": sample.timeout,
-        "error": sample.error,
+        "timestamp": ns_to_datetime(timestamp_ns).isoformat(),
+        "target": target,
+        "latency_ms": latency_ms,
+        "success": success,
+        "timeout": timeout,
+        "error": error,
     }
 
 
@@ -68,6 +109,49 @@ def serialize_outage(outage: OutageEvent) -> Dict[str, object]:
     }
 
 
+def _json_default(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# NDJSON lines use compact output, which keeps json on its C encoder (several times
+# faster than the pure-Python path that indent= forces). Session summary files stay
+# indented for people reading them; with samples in NDJSON they are small.
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"), default=_json_default)
+_PRETTY_JSON_ENCODER = json.JSONEncoder(indent=2, default=_json_default)
+
+
+def _encode_json(payload: object) -> bytes:
+    return _JSON_ENCODER.encode(payload).encode("utf-8")
+
+
+def _encode_pretty_json(payload: object, level: int) -> bytes:
+    """Encode ``payload`` with ``indent=2`` as if nested ``level`` levels deep."""
+    # Encoded strings never contain raw newlines, so this only touches layout.
+    return _PRETTY_JSON_ENCODER.encode(payload).replace("\n", "\n" + "  " * level).encode("utf-8")
+
+
+def _write_json_field(
+    stream: BinaryIO,
+    key: str,
+    file_name: Optional[str],
+    records: Iterable[object],
+) -> None:
+    """Write the summary member ``"<key>_file": "<file_name>"`` if the records live in
+    a log file, otherwise ``"<key>": [...]`` with the records streamed one by one,
+    laid out as ``json.dumps(..., indent=2)`` would."""
+    if file_name is not None:
+        stream.write(b",\n    " + _encode_json(f"{key}_file") + b": " + _encode_json(file_name))
+        return
+    stream.write(b",\n    " + _encode_json(key) + b": [")
+    empty = True
+    for record in records:
+        stream.write((b"\n      " if empty else b",\n      ") + _encode_pretty_json(record, 3))
+        empty = False
+    stream.write(b"]" if empty else b"\n    ]")
+
+
 class PlatformAdapter(Protocol):
     """Abstraction over platform-specific behaviors.
 
@@ -87,8 +171,11 @@ class PlatformAdapter(Protocol):
 class MacPlatformAdapter:
     """Default adapter tailored for macOS systems."""
 
+    def __init__(self) -> None:
+        self._pinger = IcmpPinger()
+
     def ping(self, target: str, timeout: float) -> Optional[float]:
-        return default_ping_probe(target, timeout)
+        return default_ping_probe(target, timeout, self._pinger)
 
     def sessions_directory(self) -> Path:
         return (
@@ -103,8 +190,11 @@ class MacPlatformAdapter:
 class WindowsPlatformAdapter:
     """Default adapter tailored for Windows systems."""
 
+    def __init__(self) -> None:
+        self._pinger = IcmpPinger()
+
     def ping(self, target: str, timeout: float) -> Optional[float]:
-        return windows_ping_probe(target, timeout)
+        return windows_ping_probe(target, timeout, self._pinger)
 
     def sessions_directory(self) -> Path:
         base_dir = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or str(Path.home())
@@ -132,11 +222,14 @@ class SessionSummary:
     total_pings: int
     successful_pings: int
     failed_pings: int
-    pings: List[PingSample]
+    pings: Iterable[PingSample]
     speed_samples: List[SpeedSample]
     outages: List[OutageEvent]
+    pings_file: Optional[str] = None
+    speed_samples_file: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, object]:
+    def summary_fields(self) -> Dict[str, object]:
+        """Return the scalar fields of ``to_dict`` (everything but the sample lists)."""
         return {
             "id": self.session_id,
             "start": self.start.isoformat(),
@@ -151,40 +244,264 @@ class SessionSummary:
             "total_pings": self.total_pings,
             "successful_pings": self.successful_pings,
             "failed_pings": self.failed_pings,
-            "pings": [serialize_ping(p) for p in self.pings],
-            "speed_samples": [serialize_speed(s) for s in self.speed_samples],
-            "outages": [serialize_outage(o) for o in self.outages],
         }
 
+    def to_dict(self) -> Dict[str, object]:
+        payload = self.summary_fields()
+        if self.pings_file is not None:
+            payload["pings_file"] = self.pings_file
+        else:
+            payload["pings"] = [serialize_ping(p) for p in self.pings]
+        if self.speed_samples_file is not None:
+            payload["speed_samples_file"] = self.speed_samples_file
+        else:
+            payload["speed_samples"] = [serialize_speed(s) for s in self.speed_samples]
+        payload["outages"] = [serialize_outage(o) for o in self.outages]
+        return payload
+
+
+_PING_SUCCESS = 0x01
+_PING_TIMEOUT = 0x02
+_PING_MEASURED = 0x04  # successful and carries a latency value
+_MEASURED_SELECTOR = bytes(flags & _PING_MEASURED for flags in range(256))
+
+
+def _close_quietly(stream: Optional[BinaryIO]) -> None:
+    if stream is None:
+        return
+    try:
+        stream.close()
+    except OSError:
+        pass
+
 
 class SessionRecorder:
-    """Simple in-memory recorder for samples and events."""
+    """Simple in-memory recorder for samples and events.
 
-    def __init__(self) -> None:
-        self.pings: List[PingSample] = []
-        self.speeds: List[SpeedSample] = []
-        self.outages: List[OutageEvent] = []
-        self._lock = threading.Lock()
+    Each history has its own lock so the ping and speed threads never wait on
+    each other, and ``snapshot`` only holds one lock at a time. Pass
+    ``capacity`` to keep just the newest samples of each kind during very long
+    runs; by default the full history is kept.
+
+    Pings are stored column-wise (latency, timestamp, flags and target id in
+    compact arrays) rather than as one ``PingSample`` object each; samples are
+    only materialized when read through ``pings`` or ``snapshot``.
+
+    After ``open_log``, every ping and speed sample is also appended to an
+    NDJSON file as it is recorded, so a crash loses at most the write buffer.
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        self.capacity = capacity
+        self.ping_latencies = array.array("d")
+        self.ping_timestamps_ns = array.array("Q")
+        self.ping_flags = bytearray()
+        self.ping_target_ids = array.array("H")
+        self._ping_targets: List[str] = []
+        self._ping_errors: Dict[int, str] = {}
+        self._ping_base = 0
+        self.speeds: Deque[SpeedSample] = deque(maxlen=capacity)
+        self.outages: Deque[OutageEvent] = deque(maxlen=capacity)
+        self._pings_lock = threading.Lock()
+        self._speeds_lock = threading.Lock()
+        self._outages_lock = threading.Lock()
+        self.ping_log_name: Optional[str] = None
+        self.speed_log_name: Optional[str] = None
+        self._log_directory: Optional[Path] = None
+        self._ping_log: Optional[BinaryIO] = None
+        self._speed_log: Optional[BinaryIO] = None
+        self._written_logs: Set[str] = set()
+
+    def open_log(self, directory: Path, session_id: str) -> None:
+        """Append samples to ``<session_id>.pings.ndjson``/``.speeds.ndjson`` in ``directory``."""
+        self.close_log()
+        self._log_directory = directory
+        self.ping_log_name = f"{session_id}.pings.ndjson"
+        self.speed_log_name = f"{session_id}.speeds.ndjson"
+
+    def written_log(self, name: Optional[str]) -> Optional[str]:
+        """Return ``name`` if that log file has received samples, else None."""
+        return name if name in self._written_logs else None
+
+    def close_log(self) -> None:
+        """Flush and close the NDJSON logs; the file names stay set for the summary."""
+        with self._pings_lock:
+            if self._ping_log is not None:
+                try:
+                    self._ping_log.close()
+                except OSError:
+                    self._abandon_ping_log()
+                self._ping_log = None
+        with self._speeds_lock:
+            if self._speed_log is not None:
+                try:
+                    self._speed_log.close()
+                except OSError:
+                    self._abandon_speed_log()
+                self._speed_log = None
+
+    # Logging is best effort: a write error (disk full, folder removed) must never stop
+    # sampling. The log is dropped and the summary falls back to inline samples from memory.
+    def _abandon_ping_log(self) -> None:
+        _close_quietly(self._ping_log)
+        self._written_logs.discard(self.ping_log_name)
+        self._ping_log = None
+        self.ping_log_name = None
+
+    def _abandon_speed_log(self) -> None:
+        _close_quietly(self._speed_log)
+        self._written_logs.discard(self.speed_log_name)
+        self._speed_log = None
+        self.speed_log_name = None
+
+    @property
+    def pings(self) -> List[PingSample]:
+        return list(self.iter_pings())
 
     def record_ping(self, sample: PingSample) -> None:
-        with self._lock:
-            self.pings.append(sample)
+        self.record_ping_values(
+            sample.timestamp, sample.target, sample.latency_ms, sample.success, sample.timeout, sample.error
+        )
+
+    def record_ping_values(
+        self,
+        timestamp_ns: int,
+        target: str,
+        latency_ms: Optional[float],
+        success: bool,
+        timeout: bool,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record a ping from its fields, without allocating a ``PingSample``."""
+        flags = 0
+        if success:
+            flags |= _PING_SUCCESS
+            if latency_ms is not None:
+                flags |= _PING_MEASURED
+        if timeout:
+            flags |= _PING_TIMEOUT
+        with self._pings_lock:
+            if error is not None:
+                self._ping_errors[self._ping_base + len(self.ping_flags)] = error
+            self.ping_timestamps_ns.append(timestamp_ns)
+            self.ping_latencies.append(math.nan if latency_ms is None else latency_ms)
+            self.ping_flags.append(flags)
+            self.ping_target_ids.append(self._target_id(target))
+            self._trim_pings()
+            if self.ping_log_name is not None:
+                record = _ping_record(timestamp_ns, target, latency_ms, success, timeout, error)
+                try:
+                    if self._ping_log is None:
+                        self._ping_log = self._open_log_file(self.ping_log_name)
+                    self._ping_log.write(_encode_json(record) + b"\n")
+                except OSError:
+                    self._abandon_ping_log()
+
+    def ping_latency_stats(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Return (average, minimum, maximum) latency in ms over successful pings."""
+        with self._pings_lock:
+            start = self._ping_window_start()
+            # translate() turns the flags into a 0/non-0 selector and compress()
+            # filters in C, so no Python bytecode runs per sample.
+            selectors = self.ping_flags[start:].translate(_MEASURED_SELECTOR)
+            latencies = array.array("d", itertools.compress(self.ping_latencies[start:], selectors))
+        if not latencies:
+            return None, None, None
+        return sum(latencies) / len(latencies), min(latencies), max(latencies)
+
+    def _target_id(self, target: str) -> int:
+        try:
+            return self._ping_targets.index(target)
+        except ValueError:
+            self._ping_targets.append(target)
+            return len(self._ping_targets) - 1
+
+    def _ping_window_start(self) -> int:
+        if self.capacity is None:
+            return 0
+        return max(len(self.ping_flags) - self.capacity, 0)
+
+    def _trim_pings(self) -> None:
+        # Trim in batches so bounded recorders stay amortized O(1) per sample.
+        if self.capacity is None or len(self.ping_flags) <= self.capacity + max(self.capacity // 4, 1):
+            return
+        drop = len(self.ping_flags) - self.capacity
+        del self.ping_latencies[:drop]
+        del self.ping_timestamps_ns[:drop]
+        del self.ping_flags[:drop]
+        del self.ping_target_ids[:drop]
+        self._ping_base += drop
+        self._ping_errors = {i: e for i, e in self._ping_errors.items() if i >= self._ping_base}
+
+    def iter_pings(self) -> Iterator[PingSample]:
+        """Yield recorded pings oldest first without building a list of them.
+
+        The columns are copied under the lock (a few bytes per sample), so the
+        generator can be consumed slowly while recording continues.
+        """
+        with self._pings_lock:
+            start = self._ping_window_start()
+            latencies = self.ping_latencies[start:]
+            timestamps_ns = self.ping_timestamps_ns[start:]
+            flags = self.ping_flags[start:]
+            target_ids = self.ping_target_ids[start:]
+            targets = list(self._ping_targets)
+            errors = dict(self._ping_errors)
+            base = self._ping_base + start
+        for i, latency in enumerate(latencies):
+            sample_flags = flags[i]
+            yield PingSample(
+                timestamp=timestamps_ns[i],
+                target=targets[target_ids[i]],
+                latency_ms=None if math.isnan(latency) else latency,
+                success=bool(sample_flags & _PING_SUCCESS),
+                timeout=bool(sample_flags & _PING_TIMEOUT),
+                error=errors.get(base + i),
+            )
 
     def record_speed(self, sample: SpeedSample) -> None:
-        with self._lock:
+        with self._speeds_lock:
             self.speeds.append(sample)
+            if self.speed_log_name is not None:
+                try:
+                    if self._speed_log is None:
+                        self._speed_log = self._open_log_file(self.speed_log_name)
+                    self._speed_log.write(_encode_json(serialize_speed(sample)) + b"\n")
+                except OSError:
+                    self._abandon_speed_log()
+
+    def _open_log_file(self, name: str) -> BinaryIO:
+        self._written_logs.add(name)
+        return (self._log_directory / name).open("ab", buffering=1 << 16)
 
     def record_outage(self, outage: OutageEvent) -> None:
-        with self._lock:
+        with self._outages_lock:
             self.outages.append(outage)
 
-    def snapshot(self) -> dict:
-        with self._lock:
-            return {
-                "pings": list(self.pings),
-                "speeds": list(self.speeds),
-                "outages": list(self.outages),
-            }
+    def snapshot(self, include_pings: bool = True) -> dict:
+        """Copy the recorded histories; pass ``include_pings=False`` to skip
+        materializing ping samples (use ``iter_pings`` to stream them instead)."""
+        pings = list(self.iter_pings()) if include_pings else []
+        with self._speeds_lock:
+            speeds = list(self.speeds)
+        with self._outages_lock:
+            outages = list(self.outages)
+        return {
+            "pings": pings,
+            "speeds": speeds,
+            "outages": outages,
+        }
+
+
+class MonitorSnapshot(NamedTuple):
+    """Consistent view of the live counters, as returned by ``MonitoringService.snapshot``."""
+
+    total_pings: int
+    success_pings: int
+    failed_pings: int
+    uptime_str: str
+    last_speed: Optional[SpeedSample]
+    session_started_at: Optional[datetime]
 
 
 class MonitoringService:
@@ -204,6 +521,8 @@ class MonitoringService:
         ping_probe: Optional[Callable[[str, float], float]] = None,
         downloader: Optional[Callable[[str, int, float], SpeedSample]] = None,
         platform: Optional[PlatformAdapter] = None,
+        async_pinger: Optional["AsyncIcmpPinger"] = None,
+        event_queue: Optional["queue.Queue[tuple]"] = None,
     ) -> None:
         self.target = target
         self.ping_interval = ping_interval
@@ -216,105 +535,262 @@ class MonitoringService:
         self.recorder = recorder or SessionRecorder()
         self.platform = platform or default_platform_adapter()
         self.ping_probe = ping_probe or self.platform.ping
-        self.downloader = downloader or default_downloader
+        self._speed_connection = SpeedTestConnection()
+        self.downloader = downloader or functools.partial(default_downloader, connection=self._speed_connection)
+        self.async_pinger = async_pinger
+        self._default_ping_probe = ping_probe is None
+        # Optional push channel for observers on other threads (e.g. a GUI): receives
+        # ("session", started_at), ("ping", success, timestamp_ns) and
+        # ("speed", direction, throughput_mbps, timestamp) tuples.
+        self.event_queue = event_queue
 
         self._stop_event = threading.Event()
-        self._ping_thread: Optional[threading.Thread] = None
+        self._scheduler_thread: Optional[threading.Thread] = None
         self._speed_thread: Optional[threading.Thread] = None
+        self._async_stop: Optional[asyncio.Event] = None
+        self._async_task: Optional["asyncio.Task[None]"] = None
+        # Set by stop_async when start_async's task has not begun yet, so that stop still takes effect.
+        self._async_stop_requested = False
 
+        # Guards the counters and last speed sample that ``snapshot`` reports to other threads.
+        self._lock = threading.Lock()
         self.total_pings = 0
         self.success_pings = 0
         self.failed_pings = 0
+        # Success percentage pre-formatted for display, refreshed with each ping result.
+        self.uptime_str = "0.0%"
+        self.last_speed: Optional[SpeedSample] = None
+        self._version = 0
         self._consecutive_failures = 0
         self._current_outage: Optional[OutageEvent] = None
-        self._failure_streak_start: Optional[datetime] = None
+        self._failure_streak_start: Optional[int] = None
         self.session_started_at: Optional[datetime] = None
+        self.session_suffix: Optional[str] = None
 
     def start(self) -> None:
-        if self._ping_thread and self._ping_thread.is_alive():
+        if self._scheduler_thread and self._scheduler_thread.is_alive():
             return
         self._stop_event.clear()
-        if self.session_started_at is None:
-            self.session_started_at = datetime.utcnow()
-        self._ping_thread = threading.Thread(target=self._ping_loop, daemon=True)
-        self._speed_thread = threading.Thread(target=self._speed_loop, daemon=True)
-        self._ping_thread.start()
-        self._speed_thread.start()
+        self._begin_session()
+        self._scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+        self._scheduler_thread.start()
 
     def stop(self) -> None:
         self._stop_event.set()
-        if self._ping_thread:
-            self._ping_thread.join()
+        if self._scheduler_thread:
+            self._scheduler_thread.join()
         if self._speed_thread:
             self._speed_thread.join()
+        self._speed_connection.close()
         self._close_active_outage()
         self._persist_session()
 
-    def _ping_loop(self) -> None:
-        while not self._stop_event.is_set():
-            loop_start = time.monotonic()
-            sample_time = datetime.utcnow()
-            success = False
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever ``snapshot`` would return something new; cheap to poll."""
+        return self._version
+
+    def snapshot(self) -> MonitorSnapshot:
+        """Return the live counters as one consistent tuple; safe to call from any thread."""
+        with self._lock:
+            return MonitorSnapshot(
+                self.total_pings,
+                self.success_pings,
+                self.failed_pings,
+                self.uptime_str,
+                self.last_speed,
+                self.session_started_at,
+            )
+
+    async def run(self) -> None:
+        """Run the ping and speed loops on the current event loop until ``stop_async``.
+
+        This is the asyncio counterpart of ``start``/``stop``: pings share the
+        loop's ICMP socket (see ``AsyncIcmpPinger``) and blocking speed checks
+        run in the loop's default executor. The session is persisted on exit.
+        """
+        self._async_task = asyncio.current_task()
+        if self._async_stop_requested:
+            self._async_stop_requested = False
+            return
+        self._async_stop = asyncio.Event()
+        self._begin_session()
+        if self.async_pinger is None:
+            self.async_pinger = AsyncIcmpPinger()
+        try:
+            await asyncio.gather(self._ping_loop_async(), self._speed_loop_async())
+        finally:
+            self._speed_connection.close()
+            self._close_active_outage()
+            self._persist_session()
+
+    def start_async(self) -> "asyncio.Task[None]":
+        """Schedule ``run`` on the running event loop and return its task."""
+        self._async_stop_requested = False
+        self._async_task = asyncio.ensure_future(self.run())
+        return self._async_task
+
+    async def stop_async(self) -> None:
+        """Signal ``run`` to finish and wait until the session has been persisted."""
+        task = self._async_task
+        if self._async_stop is not None:
+            self._async_stop.set()
+        elif task is not None and not task.done():
+            # Scheduled by start_async but not yet running: run() checks this on entry.
+            self._async_stop_requested = True
+        if task is not None and task is not asyncio.current_task():
+            await asyncio.gather(task, return_exceptions=True)
+
+    def _begin_session(self) -> None:
+        if self.session_started_at is None:
+            with self._lock:
+                self.session_started_at = datetime.utcnow()
+        self._emit("session", self.session_started_at)
+        sessions_dir = self._sessions_directory()
+        try:
+            sessions_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            # Without a writable folder samples stay in memory and are written inline on stop.
+            return
+        self.recorder.open_log(sessions_dir, self._session_id())
+
+    def _scheduler_loop(self) -> None:
+        """Drive pings and speed checks from one thread using a deadline heap.
+
+        Entries are ``(deadline, order, task)``; ``order`` breaks ties so the
+        callables are never compared. Each task receives the deadline it was
+        scheduled for and returns the next one, so cadence is anchored to the
+        original start and per-run overruns never accumulate into drift.
+        """
+        now = time.monotonic()
+        schedule: List[Tuple[float, int, Callable[[float], float]]] = [
+            (now, 0, self._ping_once),
+            (now, 1, self._start_speed_sample),
+        ]
+        heapq.heapify(schedule)
+        while True:
+            deadline, order, task = schedule[0]
+            if self._stop_event.wait(max(deadline - time.monotonic(), 0.0)):
+                return
+            heapq.heapreplace(schedule, (task(deadline), order, task))
+
+    def _ping_once(self, deadline: float) -> float:
+        sample_time_ns = time.time_ns()
+        timeout = False
+        latency_ms: Optional[float] = None
+        error: Optional[str] = None
+        try:
+            latency_ms = self.ping_probe(self.target, self.ping_timeout)
+        except TimeoutError:
+            timeout = True
+            error = "timeout"
+        except Exception as exc:  # pragma: no cover - defensive logging
+            error = str(exc)
+
+        self._record_ping_result(sample_time_ns, latency_ms, timeout, error)
+        return _next_deadline(deadline, self.ping_interval)
+
+    def _start_speed_sample(self, deadline: float) -> float:
+        # Downloads can take as long as speed_test_duration, so they run on a
+        # short-lived worker instead of delaying the pings on this thread.
+        if self.speed_blob_url and not (self._speed_thread and self._speed_thread.is_alive()):
+            self._speed_thread = threading.Thread(target=self._run_speed_sample, daemon=True)
+            self._speed_thread.start()
+        return _next_deadline(deadline, self.speed_interval)
+
+    async def _ping_loop_async(self) -> None:
+        next_fire = time.monotonic()
+        while not self._async_stop.is_set():
+            sample_time_ns = time.time_ns()
             timeout = False
             latency_ms: Optional[float] = None
             error: Optional[str] = None
             try:
-                latency_ms = self.ping_probe(self.target, self.ping_timeout)
-                success = latency_ms is not None
+                if self._default_ping_probe and self.async_pinger.available:
+                    latency_ms = await self.async_pinger.ping(self.target, self.ping_timeout)
+                else:
+                    latency_ms = await asyncio.to_thread(self.ping_probe, self.target, self.ping_timeout)
             except TimeoutError:
                 timeout = True
-                success = False
                 error = "timeout"
             except Exception as exc:  # pragma: no cover - defensive logging
-                success = False
                 error = str(exc)
 
+            self._record_ping_result(sample_time_ns, latency_ms, timeout, error)
+
+            next_fire = _next_deadline(next_fire, self.ping_interval)
+            await self._wait_async(max(next_fire - time.monotonic(), 0.0))
+
+    def _record_ping_result(
+        self,
+        sample_time_ns: int,
+        latency_ms: Optional[float],
+        timeout: bool,
+        error: Optional[str],
+    ) -> None:
+        success = latency_ms is not None
+        with self._lock:
             self.total_pings += 1
             if success:
                 self.success_pings += 1
-                self._consecutive_failures = 0
-                self._failure_streak_start = None
-                if self._current_outage:
-                    self._current_outage.end = sample_time
-                    self.recorder.record_outage(self._current_outage)
-                    self._current_outage = None
             else:
                 self.failed_pings += 1
-                self._consecutive_failures += 1
-                if self._failure_streak_start is None:
-                    self._failure_streak_start = sample_time
-                if (
-                    not self._current_outage
-                    and self._consecutive_failures >= self.consecutive_failure_threshold
-                ):
-                    outage_start = self._failure_streak_start or sample_time
-                    self._current_outage = OutageEvent(
-                        start=outage_start,
-                        failure_count=self._consecutive_failures,
-                    )
-                elif self._current_outage:
-                    self._current_outage.failure_count = self._consecutive_failures
-
-            self.recorder.record_ping(
-                PingSample(
-                    timestamp=sample_time,
-                    target=self.target,
-                    latency_ms=latency_ms,
-                    success=success,
-                    timeout=timeout,
-                    error=error,
-                )
+            self.uptime_str = f"{(self.success_pings / self.total_pings) * 100.0:.1f}%"
+        if success:
+            self._on_success(sample_time_ns)
+        else:
+            self._on_failure(sample_time_ns)
+
+        self.recorder.record_ping_values(sample_time_ns, self.target, latency_ms, success, timeout, error)
+        self._emit("ping", success, sample_time_ns)
+
+    def _emit(self, *event: object) -> None:
+        if self.event_queue is not None:
+            self.event_queue.put_nowait(event)
+        # Bump after queueing so a reader that sees the new version also finds the event.
+        with self._lock:
+            self._version += 1
+
+    def _on_success(self, sample_time_ns: int) -> None:
+        # An open outage implies a failure streak, so the usual case stops here.
+        if not self._consecutive_failures:
+            return
+        self._consecutive_failures = 0
+        self._failure_streak_start = None
+        if self._current_outage:
+            self._current_outage.end = ns_to_datetime(sample_time_ns)
+            self.recorder.record_outage(self._current_outage)
+            self._current_outage = None
+
+    def _on_failure(self, sample_time_ns: int) -> None:
+        self._consecutive_failures += 1
+        if self._current_outage:
+            self._current_outage.failure_count = self._consecutive_failures
+            return
+        if self._failure_streak_start is None:
+            self._failure_streak_start = sample_time_ns
+        if self._consecutive_failures >= self.consecutive_failure_threshold:
+            self._current_outage = OutageEvent(
+                start=ns_to_datetime(self._failure_streak_start),
+                failure_count=self._consecutive_failures,
             )
 
-            elapsed = time.monotonic() - loop_start
-            sleep_for = max(self.ping_interval - elapsed, 0.01)
-            self._stop_event.wait(sleep_for)
+    async def _speed_loop_async(self) -> None:
+        next_fire = time.monotonic()
+        await asyncio.to_thread(self._run_speed_sample)
+        while True:
+            next_fire = _next_deadline(next_fire, self.speed_interval)
+            if await self._wait_async(max(next_fire - time.monotonic(), 0.0)):
+                return
+            await asyncio.to_thread(self._run_speed_sample)
 
-    def _speed_loop(self) -> None:
-        # run an initial speed check
-        self._run_speed_sample()
-        while not self._stop_event.wait(self.speed_interval):
-            self._run_speed_sample()
+    async def _wait_async(self, delay: float) -> bool:
+        """Sleep for ``delay`` seconds; return True early if a stop was requested."""
+        try:
+            await asyncio.wait_for(self._async_stop.wait(), delay)
+        except asyncio.TimeoutError:
+            return False
+        return True
 
     def _run_speed_sample(self) -> None:
         if not self.speed_blob_url:
@@ -326,6 +802,7 @@ class MonitoringService:
                     self.speed_blob_url,
                     self.speed_test_duration,
                     self.ping_timeout,
+                    self._speed_connection,
                 )
             else:
                 speed_sample = self.downloader(self.speed_blob_url, self.speed_blob_bytes, self.ping_timeout)
@@ -341,6 +818,9 @@ class MonitoringService:
         else:
             speed_sample.timestamp = sample_time
         self.recorder.record_speed(speed_sample)
+        with self._lock:
+            self.last_speed = speed_sample
+        self._emit("speed", speed_sample.direction, speed_sample.throughput_mbps, speed_sample.timestamp)
 
     def _close_active_outage(self) -> None:
         if self._current_outage:
@@ -353,22 +833,16 @@ class MonitoringService:
             return
 
         end_time = datetime.utcnow()
-        snapshot = self.recorder.snapshot()
-        pings: List[PingSample] = snapshot["pings"]
+        self.recorder.close_log()
+        snapshot = self.recorder.snapshot(include_pings=False)
         speeds: List[SpeedSample] = snapshot["speeds"]
         outages: List[OutageEvent] = snapshot["outages"]
 
-        successful_latencies = [p.latency_ms for p in pings if p.success and p.latency_ms is not None]
-        average_ping = sum(successful_latencies) / len(successful_latencies) if successful_latencies else None
-        min_ping = min(successful_latencies) if successful_latencies else None
-        max_ping = max(successful_latencies) if successful_latencies else None
+        average_ping, min_ping, max_ping = self.recorder.ping_latency_stats()
 
         duration_seconds = max((end_time - self.session_started_at).total_seconds(), 0.0)
         uptime_ratio = (self.success_pings / self.total_pings) if self.total_pings else 0.0
-        interruption_durations: List[float] = []
-        for outage in outages:
-            if outage.end:
-                interruption_durations.append((outage.end - outage.start).total_seconds())
+        interruption_durations = [(o.end - o.start).total_seconds() for o in outages if o.end]
 
         session = SessionSummary(
             session_id=self._session_id(),
@@ -384,21 +858,42 @@ class MonitoringService:
             total_pings=self.total_pings,
             successful_pings=self.success_pings,
             failed_pings=self.failed_pings,
-            pings=pings,
+            pings=self.recorder.iter_pings(),
             speed_samples=speeds,
             outages=outages,
+            pings_file=self.recorder.written_log(self.recorder.ping_log_name),
+            speed_samples_file=self.recorder.written_log(self.recorder.speed_log_name),
         )
 
         sessions_dir = self._sessions_directory()
         sessions_dir.mkdir(parents=True, exist_ok=True)
-        payload = {
-            "summary": session.to_dict(),
-            "summary_text": self._format_summary_text(session),
-        }
         session_file = sessions_dir / f"{session.session_id}.json"
-        session_file.write_text(json.dumps(payload, indent=2))
+        self._write_session_file(session_file, session)
         self._update_index(session, session_file)
 
+    def _write_session_file(self, session_file: Path, session: SessionSummary) -> None:
+        """Stream ``{"summary": ..., "summary_text": ...}`` record by record.
+
+        Produces the same document as encoding ``session.to_dict()`` but never
+        holds the serialized ping history in memory at once.
+        """
+        header = _encode_pretty_json(session.summary_fields(), 1)
+        # Write beside the target and rename into place so a crash never leaves a torn file.
+        partial_file = session_file.with_name(session_file.name + ".tmp")
+        with partial_file.open("wb", buffering=1 << 20) as stream:
+            # Drop the header's closing brace line; the sample fields continue the object.
+            stream.write(b'{\n  "summary": ' + header[: header.rindex(b"\n")])
+            _write_json_field(stream, "pings", session.pings_file, (serialize_ping(p) for p in session.pings))
+            _write_json_field(
+                stream,
+                "speed_samples",
+                session.speed_samples_file,
+                (serialize_speed(s) for s in session.speed_samples),
+            )
+            _write_json_field(stream, "outages", None, (serialize_outage(o) for o in session.outages))
+            stream.write(b'\n  },\n  "summary_text": ' + _encode_json(self._format_summary_text(session)) + b"\n}")
+        os.replace(partial_file, session_file)
+
     def _sessions_directory(self) -> Path:
         """Return the platform-specific storage directory for session files."""
 
@@ -406,24 +901,24 @@ class MonitoringService:
 
     def _session_id(self) -> str:
         started = self.session_started_at or datetime.utcnow()
-        return started.strftime("%Y%m%dT%H%M%SZ")
+        session_id = started.strftime("%Y%m%dT%H%M%SZ")
+        if self.session_suffix:
+            session_id = f"{session_id}_{self.session_suffix}"
+        return session_id
 
     def _update_index(self, session: SessionSummary, session_file: Path) -> None:
-        index_file = session_file.parent / "index.json"
-        index: Dict[str, Dict[str, object]] = {}
-        if index_file.exists():
-            try:
-                index = json.loads(index_file.read_text())
-            except json.JSONDecodeError:
-                index = {}
-        index[session.session_id] = {
-            "file": session_file.name,
-            "start": session.start.isoformat(),
-            "end": session.end.isoformat(),
-            "duration_seconds": session.duration_seconds,
-            "uptime_ratio": session.uptime_ratio,
+        """Append this session's entry to ``index.ndjson``; see ``load_session_index``."""
+        entry = {
+            session.session_id: {
+                "file": session_file.name,
+                "start": session.start.isoformat(),
+                "end": session.end.isoformat(),
+                "duration_seconds": session.duration_seconds,
+                "uptime_ratio": session.uptime_ratio,
+            }
         }
-        index_file.write_text(json.dumps(index, indent=2))
+        with (session_file.parent / SESSION_INDEX_LOG).open("ab") as stream:
+            stream.write(_encode_json(entry) + b"\n")
 
     @staticmethod
     def _format_summary_text(session: SessionSummary) -> str:
@@ -447,38 +942,423 @@ class MonitoringService:
         return "\n".join(lines)
 
 
-def default_ping_probe(target: str, timeout: float) -> Optional[float]:
-    """Send a single ping and return latency in milliseconds or None on failure."""
+def _next_deadline(deadline: float, interval: float) -> float:
+    """Advance ``deadline`` by ``interval`` on the monotonic clock.
+
+    Slots that have already passed (a probe overran a whole interval) are
+    skipped rather than fired back to back, keeping the long-term rate fixed.
+    """
+    now = time.monotonic()
+    if interval <= 0:
+        return now
+    next_deadline = deadline + interval
+    if next_deadline < now:
+        next_deadline += math.ceil((now - next_deadline) / interval) * interval
+    return next_deadline
+
+
+SESSION_INDEX_LOG = "index.ndjson"
+LEGACY_SESSION_INDEX = "index.json"
+
+
+def load_session_index(sessions_dir: Path) -> Dict[str, Dict[str, object]]:
+    """Return ``{session_id: entry}`` for every session recorded in ``sessions_dir``.
+
+    Each stop appends one line to ``index.ndjson`` instead of rewriting a
+    growing ``index.json``; entries from an older ``index.json`` are merged in
+    first. A torn final line from an interrupted append is skipped.
+    """
+    index: Dict[str, Dict[str, object]] = {}
+    legacy_file = sessions_dir / LEGACY_SESSION_INDEX
+    if legacy_file.exists():
+        try:
+            index.update(json.loads(legacy_file.read_text()))
+        except json.JSONDecodeError:
+            pass
+    log_file = sessions_dir / SESSION_INDEX_LOG
+    if log_file.exists():
+        with log_file.open("rb") as stream:
+            for line in stream:
+                try:
+                    index.update(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return index
+
+
+class MonitoringGroup:
+    """Runs several ``MonitoringService`` instances on a single event loop.
+
+    All services share one ``AsyncIcmpPinger`` so N targets cost one socket and
+    no per-target threads. Each service still persists its own session file,
+    suffixed with its target so sessions started in the same second stay apart.
+    """
+
+    def __init__(self, services: List[MonitoringService]) -> None:
+        self.services = list(services)
+        self.pinger = AsyncIcmpPinger()
+        for service in self.services:
+            service.async_pinger = self.pinger
+            service.session_suffix = re.sub(r"[^A-Za-z0-9.-]", "_", service.target)
+
+    async def run(self) -> None:
+        await asyncio.gather(*(service.run() for service in self.services))
+
+    def start_async(self) -> "asyncio.Task[None]":
+        # Schedule every service now so an immediate stop_async reaches each pending task.
+        tasks = [service.start_async() for service in self.services]
+        return asyncio.ensure_future(_wait_all(tasks))
+
+    async def stop_async(self) -> None:
+        await asyncio.gather(*(service.stop_async() for service in self.services))
+
+
+async def _wait_all(tasks: List["asyncio.Task[None]"]) -> None:
+    await asyncio.gather(*tasks)
+
+
+_DNS_TTL_SECONDS = 60.0
+_dns_cache: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+
+
+def _cached_sockaddr(host: str, family: int, ttl: float) -> Optional[tuple]:
+    hit = _dns_cache.get((host, family))
+    if hit and time.monotonic() - hit[0] < ttl:
+        return hit[1][0]
+    return None
+
+
+def resolve_all(host: str, family: int = socket.AF_INET, ttl: float = _DNS_TTL_SECONDS) -> List[tuple]:
+    """Return every distinct ``sockaddr`` for ``host`` in resolver order, cached for ``ttl`` seconds."""
+    hit = _dns_cache.get((host, family))
+    if hit and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    addresses = list(dict.fromkeys(info[4] for info in socket.getaddrinfo(host, None, family)))
+    _dns_cache[(host, family)] = (time.monotonic(), addresses)
+    return addresses
+
+
+def resolve(host: str, family: int = socket.AF_INET, ttl: float = _DNS_TTL_SECONDS) -> tuple:
+    """Return the first ``sockaddr`` for ``host``, reusing lookups younger than ``ttl`` seconds."""
+    return resolve_all(host, family, ttl)[0]
+
+
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+_ICMP_HEADER = struct.Struct("!BBHHH")
+_ICMP_PAYLOAD = b"internetconnectiontestingapp"
+_ICMP_RECV_BATCH = 64
+_MAC_PING_RE = re.compile(rb"time=([0-9.]+) ms")
+_WIN_PING_RE = re.compile(rb"time[=<]\s*([0-9]+)ms")
+
+
+def _icmp_checksum(data: bytes) -> int:
+    """Return the RFC 1071 Internet checksum of ``data``."""
+    if len(data) % 2:
+        data += b"\x00"
+    words = array.array("H", data)
+    if sys.byteorder == "little":
+        words.byteswap()
+    total = sum(words)
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _build_echo_request(identifier: int, sequence: int) -> bytes:
+    header = _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _icmp_checksum(header + _ICMP_PAYLOAD)
+    return _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + _ICMP_PAYLOAD
+
+
+class IcmpPinger:
+    """Sends ICMP echo requests over a single reusable socket.
+
+    An unprivileged ``SOCK_DGRAM`` ICMP socket is tried first (macOS, and Linux
+    when ``net.ipv4.ping_group_range`` allows it), then ``SOCK_RAW``. When
+    neither can be opened the pinger reports itself unavailable so callers can
+    fall back to the system ``ping`` binary.
+    """
+
+    def __init__(self) -> None:
+        self._sock: Optional[socket.socket] = None
+        self._raw = False
+        self._check_identifier = True
+        self._unavailable = False
+        self._identifier = os.getpid() & 0xFFFF
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self._ensure_socket() is not None
+
+    def _ensure_socket(self) -> Optional[socket.socket]:
+        if self._sock is not None or self._unavailable:
+            return self._sock
+        for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+                if sock_type == socket.SOCK_RAW:
+                    # Windows refuses recvfrom() on an unbound raw socket.
+                    sock.bind(("0.0.0.0", 0))
+            except OSError:
+                continue
+            self._sock = sock
+            self._raw = sock_type == socket.SOCK_RAW
+            # Linux rewrites the identifier of datagram ICMP sockets to the local port (and
+            # only delivers that socket's own replies). Everywhere else, e.g. macOS datagram
+            # sockets, other processes' replies arrive too and the identifier tells them apart.
+            self._check_identifier = self._raw or not sys.platform.startswith("linux")
+            return sock
+        self._unavailable = True
+        return None
+
+    def ping(self, target: str, timeout: float) -> Optional[float]:
+        """Send one echo request and return the round trip in milliseconds or None."""
+        sock = self._ensure_socket()
+        if sock is None:
+            raise OSError("ICMP sockets are unavailable")
+        try:
+            address = resolve(target)[0]
+        except OSError:
+            return None
+
+        with self._lock:
+            self._sequence = (self._sequence + 1) & 0xFFFF
+            sequence = self._sequence
+            packet = _build_echo_request(self._identifier, sequence)
+            start = time.monotonic()
+            deadline = start + timeout
+            try:
+                sock.sendto(packet, (address, 0))
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    sock.settimeout(remaining)
+                    data, peer = sock.recvfrom(1024)
+                    if peer[0] == address and self._reply_sequence(data) == sequence:
+                        return (time.monotonic() - start) * 1000.0
+            except OSError:
+                return None
+
+    def _reply_sequence(self, data: bytes) -> Optional[int]:
+        """Return the sequence number of an echo reply addressed to us, else None."""
+        if data and data[0] >> 4 == 4:
+            # Raw sockets (and macOS datagram sockets) include the IPv4 header.
+            data = data[(data[0] & 0x0F) * 4 :]
+        if len(data) < _ICMP_HEADER.size:
+            return None
+        icmp_type, _code, _checksum, identifier, sequence = _ICMP_HEADER.unpack_from(data)
+        if icmp_type != _ICMP_ECHO_REPLY:
+            return None
+        if self._check_identifier and identifier != self._identifier:
+            return None
+        return sequence
+
+
+class AsyncIcmpPinger:
+    """Multiplexes echo requests from many coroutines over one ICMP socket.
+
+    Replies are demultiplexed by sequence number from a reader callback on the
+    event loop, so any number of monitors can share the socket without a thread
+    each. ``available`` is False when no ICMP socket can be opened or the loop
+    cannot watch sockets (e.g. the Windows proactor loop); callers then fall
+    back to running the blocking probe in an executor.
+
+    Echo requests issued during the same loop iteration are queued and sent in
+    one burst, and each readable wakeup drains every pending reply, so a tick
+    across many targets costs one loop callback for sends and one for receives.
+    """
+
+    def __init__(self) -> None:
+        self._pinger = IcmpPinger()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._unsupported = False
+        self._sequence = 0
+        self._waiters: Dict[int, Tuple["asyncio.Future[float]", str]] = {}
+        self._sent_at: Dict[int, float] = {}
+        self._outbox: List[Tuple[int, bytes, str]] = []
+
+    @property
+    def available(self) -> bool:
+        """Whether ``ping`` can run; inside a coroutine this also checks the running loop."""
+        if self._unsupported or not self._pinger.available:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        return self._attach(loop) is not None
+
+    def _attach(self, loop: asyncio.AbstractEventLoop) -> Optional[socket.socket]:
+        sock = self._pinger._ensure_socket()
+        if sock is None or self._unsupported:
+            return None
+        if self._loop is not loop:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(sock.fileno())
+            sock.setblocking(False)
+            try:
+                loop.add_reader(sock.fileno(), self._on_readable)
+            except NotImplementedError:
+                self._unsupported = True
+                return None
+            self._loop = loop
+            self._waiters.clear()
+            self._sent_at.clear()
+            self._outbox.clear()
+        return sock
+
+    async def ping(self, target: str, timeout: float) -> Optional[float]:
+        """Send one echo request and return the round trip in milliseconds or None."""
+        loop = asyncio.get_running_loop()
+        sock = self._attach(loop)
+        if sock is None:
+            raise OSError("ICMP sockets are unavailable")
+        try:
+            sockaddr = _cached_sockaddr(target, socket.AF_INET, _DNS_TTL_SECONDS)
+            if sockaddr is None:
+                sockaddr = await loop.run_in_executor(None, resolve, target)
+        except OSError:
+            return None
+        address = sockaddr[0]
+
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        sequence = self._sequence
+        future: "asyncio.Future[float]" = loop.create_future()
+        self._waiters[sequence] = (future, address)
+        if not self._outbox:
+            loop.call_soon(self._flush_sends)
+        self._outbox.append((sequence, _build_echo_request(self._pinger._identifier, sequence), address))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            self._waiters.pop(sequence, None)
+            self._sent_at.pop(sequence, None)
+
+    def _flush_sends(self) -> None:
+        sock = self._pinger._sock
+        outbox, self._outbox = self._outbox, []
+        for sequence, packet, address in outbox:
+            waiter = self._waiters.get(sequence)
+            if waiter is None or waiter[0].done():
+                continue
+            self._sent_at[sequence] = time.monotonic()
+            try:
+                sock.sendto(packet, (address, 0))
+            except OSError as exc:
+                waiter[0].set_exception(exc)
+
+    def _on_readable(self) -> None:
+        sock = self._pinger._sock
+        for _ in range(_ICMP_RECV_BATCH):
+            try:
+                data, peer = sock.recvfrom(1024)
+            except OSError:
+                return
+            received = time.monotonic()
+            sequence = self._pinger._reply_sequence(data)
+            waiter = self._waiters.get(sequence)
+            if waiter is not None and waiter[1] == peer[0] and not waiter[0].done():
+                waiter[0].set_result((received - self._sent_at[sequence]) * 1000.0)
+
+
+@functools.lru_cache(maxsize=32)
+def _mac_ping_argv(target: str, timeout: float) -> Tuple[str, ...]:
+    return ("ping", "-n", "-c", "1", "-W", str(max(1, int(timeout))), target)
+
+
+@functools.lru_cache(maxsize=32)
+def _windows_ping_argv(target: str, timeout: float) -> Tuple[str, ...]:
+    return ("ping", "-n", "1", "-w", str(max(1, int(timeout * 1000))), target)
+
+
+def _spawn_ping(argv: Tuple[str, ...], timeout: float) -> Optional[bytes]:
+    """Run ``argv`` and return its stdout, or None if it fails or outlives ``timeout``.
+
+    Uses ``os.posix_spawnp`` with a bare pipe rather than ``subprocess.run``,
+    skipping the Popen setup that dominates the cost of a one-shot ``ping``.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        try:
+            completed = run(argv, capture_output=True, timeout=timeout, check=False)
+        except Exception:
+            return None
+        return completed.stdout if completed.returncode == 0 else None
+
+    read_fd, write_fd = os.pipe()
     try:
-        completed = run(
-            ["ping", "-n", "-c", "1", "-W", str(max(1, int(timeout))), target],
-            capture_output=True,
-            text=True,
-            timeout=timeout + 0.5,
-            check=False,
+        pid = os.posix_spawnp(
+            argv[0],
+            argv,
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_DUP2, write_fd, 1),
+                (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            ],
         )
-    except CalledProcessError:
+    except OSError:
+        os.close(read_fd)
         return None
-    except Exception:
+    finally:
+        os.close(write_fd)
+
+    chunks: List[bytes] = []
+    timed_out = False
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            chunk = os.read(read_fd, 4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+    if timed_out or os.waitstatus_to_exitcode(status) != 0:
         return None
+    return b"".join(chunks)
 
-    if completed.returncode != 0:
+
+def default_ping_probe(target: str, timeout: float, pinger: Optional[IcmpPinger] = None) -> Optional[float]:
+    """Send a single ping and return latency in milliseconds or None on failure.
+
+    Uses ``pinger``'s ICMP socket when one can be opened and falls back to the
+    ``ping`` binary otherwise.
+    """
+    if pinger is not None and pinger.available:
+        return pinger.ping(target, timeout)
+    stdout = _spawn_ping(_mac_ping_argv(target, timeout), timeout + 0.5)
+    if stdout is None:
         return None
 
-    match = re.search(r"time=([0-9.]+) ms", completed.stdout)
+    match = _MAC_PING_RE.search(stdout)
     if not match:
         return None
     return float(match.group(1))
 
 
-def windows_ping_probe(target: str, timeout: float) -> Optional[float]:
-    """Send a single ping on Windows and return latency in milliseconds or None."""
-    timeout_ms = max(1, int(timeout * 1000))
+def windows_ping_probe(target: str, timeout: float, pinger: Optional[IcmpPinger] = None) -> Optional[float]:
+    """Send a single ping on Windows and return latency in milliseconds or None.
+
+    Raw ICMP sockets need an elevated process on Windows, so ``ping.exe`` remains
+    the usual path; ``pinger`` is used whenever its socket can be opened.
+    """
+    if pinger is not None and pinger.available:
+        return pinger.ping(target, timeout)
     try:
         completed = run(
-            ["ping", "-n", "1", "-w", str(timeout_ms), target],
+            _windows_ping_argv(target, timeout),
             capture_output=True,
-            text=True,
             timeout=timeout + 1.0,
             check=False,
         )
@@ -490,19 +1370,147 @@ def windows_ping_probe(target: str, timeout: float) -> Optional[float]:
     if completed.returncode != 0:
         return None
 
-    match = re.search(r"time[=<]\s*([0-9]+)ms", completed.stdout)
+    match = _WIN_PING_RE.search(completed.stdout)
     if not match:
         return None
     return float(match.group(1))
 
 
-def default_downloader(url: str, expected_bytes: int, timeout: float) -> SpeedSample:
-    import urllib.request
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+
+
+def _proxied(parts: urllib.parse.SplitResult) -> bool:
+    """Return True when ``parts`` should be fetched through a configured proxy."""
+    return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+class SpeedTestConnection:
+    """Keeps one HTTP(S) connection alive across speed samples.
+
+    Reusing the connection skips DNS, TCP and TLS setup on every sample after
+    the first. A connection whose response was not read to the end cannot be
+    reused and is closed; the next sample reconnects transparently.
+    """
+
+    def __init__(self) -> None:
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._key: Optional[Tuple[str, str, Optional[int]]] = None
+
+    def open(self, url: str, timeout: float) -> http.client.HTTPResponse:
+        """Issue a GET for ``url`` and return the response once headers arrive.
+
+        Redirects are followed (reconnecting when the host changes). URLs that
+        must go through a proxy from the environment or system settings are
+        fetched with ``urllib.request.urlopen`` instead of the kept-alive
+        connection.
+        """
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            if _proxied(parts):
+                return urllib.request.urlopen(url, timeout=timeout)
+            response = self._request(parts, timeout)
+            location = response.getheader("Location")
+            if response.status in _REDIRECT_STATUSES and location:
+                # Drain the (small) redirect body so the connection can be reused.
+                try:
+                    response.read()
+                except BaseException:
+                    self.discard(response)
+                    raise
+                self.release(response)
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if response.status != 200:
+                self.release(response)
+                raise OSError(f"HTTP {response.status} {response.reason}")
+            return response
+        raise OSError(f"More than {_MAX_REDIRECTS} redirects for {url}")
+
+    def _request(self, parts: urllib.parse.SplitResult, timeout: float) -> http.client.HTTPResponse:
+        key = (parts.scheme, parts.hostname or "", parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        if self._key != key:
+            self.close()
+        for attempt in range(2):
+            if self._conn is None:
+                connection_class = (
+                    http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+                )
+                self._conn = connection_class(key[1], key[2], timeout=timeout)
+                # Connect to the cached address; TLS still verifies against the hostname.
+                self._conn._create_connection = self._connect_cached
+                self._key = key
+            reused = self._conn.sock is not None
+            if reused:
+                self._conn.sock.settimeout(timeout)
+            try:
+                self._conn.request("GET", path, headers={"Accept-Encoding": "identity"})
+                response = self._conn.getresponse()
+            except (ConnectionError, http.client.HTTPException):
+                # The server may have dropped an idle keep-alive connection.
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                # A request left half-sent (e.g. on timeout) cannot be reused.
+                self.close()
+                raise
+            break
+        return response
 
-    start = time.monotonic()
-    with urllib.request.urlopen(url, timeout=timeout) as response:
-        data = response.read(expected_bytes)
-    duration = max(time.monotonic() - start, 1e-6)
+    @staticmethod
+    def _connect_cached(address: Tuple[str, int], timeout: float, source_address=None) -> socket.socket:
+        # Like create_connection, try each address in turn so a dead IPv6 path falls back to IPv4.
+        host, port = address
+        error: Optional[OSError] = None
+        for sockaddr in resolve_all(host, socket.AF_UNSPEC):
+            try:
+                return socket.create_connection((sockaddr[0], port), timeout, source_address)
+            except OSError as exc:
+                error = exc
+        raise error
+
+    def release(self, response: http.client.HTTPResponse) -> None:
+        """Return the connection for reuse, or drop it if ``response`` was not drained."""
+        if not response.isclosed():
+            response.close()
+            self.close()
+
+    def discard(self, response: http.client.HTTPResponse) -> None:
+        """Drop ``response`` and its connection after a failed read."""
+        response.close()
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._key = None
+
+
+def default_downloader(
+    url: str,
+    expected_bytes: int,
+    timeout: float,
+    connection: Optional[SpeedTestConnection] = None,
+) -> SpeedSample:
+    owned = connection is None
+    connection = connection or SpeedTestConnection()
+    try:
+        response = connection.open(url, timeout)
+        try:
+            start = time.monotonic()
+            data = response.read(expected_bytes)
+            duration = max(time.monotonic() - start, 1e-6)
+        except BaseException:
+            connection.discard(response)
+            raise
+        connection.release(response)
+    finally:
+        if owned:
+            connection.close()
     throughput_mbps = (len(data) * 8) / (duration * 1_000_000)
     return SpeedSample(
         timestamp=datetime.utcnow(),
@@ -513,21 +1521,37 @@ def default_downloader(url: str, expected_bytes: int, timeout: float) -> SpeedSa
     )
 
 
-def continuous_downloader(url: str, duration_seconds: float, timeout: float) -> SpeedSample:
-    import urllib.request
-
+def continuous_downloader(
+    url: str,
+    duration_seconds: float,
+    timeout: float,
+    connection: Optional[SpeedTestConnection] = None,
+) -> SpeedSample:
     duration_seconds = max(duration_seconds, 0.1)
-    start = time.monotonic()
+    owned = connection is None
+    connection = connection or SpeedTestConnection()
     bytes_read = 0
-    with urllib.request.urlopen(url, timeout=timeout) as response:
-        while True:
-            chunk = response.read(64 * 1024)
-            if not chunk:
-                break
-            bytes_read += len(chunk)
-            if time.monotonic() - start >= duration_seconds:
-                break
-    duration = max(time.monotonic() - start, 1e-6)
+    try:
+        response = connection.open(url, timeout)
+        try:
+            # Read into one reusable buffer so the transfer loop allocates nothing per chunk.
+            buffer = memoryview(bytearray(64 * 1024))
+            start = time.monotonic()
+            while True:
+                count = response.readinto(buffer)
+                if not count:
+                    break
+                bytes_read += count
+                if time.monotonic() - start >= duration_seconds:
+                    break
+            duration = max(time.monotonic() - start, 1e-6)
+        except BaseException:
+            connection.discard(response)
+            raise
+        connection.release(response)
+    finally:
+        if owned:
+            connection.close()
     throughput_mbps = (bytes_read * 8) / (duration * 1_000_000)
     return SpeedSample(
         timestamp=datetime.utcnow(),
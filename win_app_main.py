@@ -3,13 +3,18 @@
 Launch this with PyInstaller (see README) to produce a double-clickable app
 that starts/stops monitoring and shows where session logs are written.
 """
-import threading
+import math
+import queue
 import tkinter as tk
 from datetime import datetime
-from tkinter import messagebox
-from typing import Optional
+from tkinter import ttk
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Set
 
-from monitoring_service import MonitoringService
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    from monitoring_service import MonitoringService
 
 DEFAULT_TARGET = "1.1.1.1"
 DEFAULT_PING_INTERVAL = 1.0
@@ -17,112 +22,250 @@ DEFAULT_PING_TIMEOUT = 1.0
 DEFAULT_SPEED_INTERVAL = 30.0
 DEFAULT_SPEED_DURATION = 10.0
 DEFAULT_SPEED_URL = "https://speed.cloudflare.com/__down?bytes=524288"
+DEFAULT_UI_REFRESH_MS = 1000
+STATUS_FIELDS = ("session", "folder", "pings", "uptime", "speed")
+# Numeric monitor settings: (MonitoringService keyword, form variable attribute, lower bound).
+MONITOR_SETTINGS = (
+    ("ping_interval", "ping_interval_var", 0.2),
+    ("ping_timeout", "ping_timeout_var", 0.2),
+    ("speed_interval", "speed_interval_var", 5.0),
+    ("speed_test_duration", "speed_duration_var", 0.0),
+)
+
+
+def _parse_target(text: str) -> str:
+    target = text.strip()
+    if not target:
+        raise ValueError("empty target")
+    return target
+
+
+def _parse_seconds(text: str) -> float:
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"not a finite number: {text!r}")
+    return value
+
+
+def _parse_milliseconds(text: str) -> int:
+    # int(float("inf")) raises OverflowError; finite values always convert.
+    return int(_parse_seconds(text))
+
+
+PAD = {"padx": 10, "pady": 6}
+SECONDS_ERROR = "Enter a number of seconds"
+# Form rows: (label, attribute prefix, entry width, default, parser or None, error message).
+# Each row creates ``<prefix>_var`` and ``<prefix>_entry`` attributes on the app.
+FORM_FIELDS = (
+    ("Ping target (hostname or IP)", "target", 40, DEFAULT_TARGET, _parse_target, "Enter a hostname or IP"),
+    ("Ping interval (seconds)", "ping_interval", 10, str(DEFAULT_PING_INTERVAL), _parse_seconds, SECONDS_ERROR),
+    ("Ping timeout (seconds)", "ping_timeout", 10, str(DEFAULT_PING_TIMEOUT), _parse_seconds, SECONDS_ERROR),
+    ("Speed check interval (seconds)", "speed_interval", 10, str(DEFAULT_SPEED_INTERVAL), _parse_seconds, SECONDS_ERROR),
+    ("Speed test duration (seconds)", "speed_duration", 10, str(DEFAULT_SPEED_DURATION), _parse_seconds, SECONDS_ERROR),
+    ("Speed download URL", "speed_url", 40, DEFAULT_SPEED_URL, None, ""),
+    ("UI refresh (ms)", "ui_refresh", 10, str(DEFAULT_UI_REFRESH_MS), _parse_milliseconds, "Enter a number of milliseconds"),
+)
 
 
 class MonitorApp(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title("Internet Connection Tester")
-        self.geometry("460x260")
+        self.geometry("460x300")
         self.resizable(False, False)
 
-        self.monitor: Optional[MonitoringService] = None
-        self.monitor_thread: Optional[threading.Thread] = None
+        self.monitor: Optional["MonitoringService"] = None
+        # Created on first start so concurrent.futures stays off the startup path.
+        self._executor: Optional["ThreadPoolExecutor"] = None
+        self._monitor_future: Optional["Future[None]"] = None
+        self._monitor_loop: Optional["asyncio.AbstractEventLoop"] = None
         self._status_updater: Optional[str] = None
+        self._status_suspended = False
+        self._ui_refresh_ms = DEFAULT_UI_REFRESH_MS
+        self._status_texts: Dict[str, str] = {}
+        self._invalid_fields: Set[str] = set()
+        self._form_valid = True
+        self._events: "queue.Queue[tuple]" = queue.Queue()
+        self._last_version = -1
+        # Updates collected from drained events but not yet shown (the window may be minimized).
+        self._pending_session: Optional[datetime] = None
+        self._pending_speed: Optional[tuple] = None
+        self._pings_dirty = False
+        # Fully formatted folder line; it stays fixed for the whole run.
+        self._folder_line: Optional[str] = None
 
         self._build_form()
         self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.bind("<Unmap>", self._on_unmap)
+        self.bind("<Map>", self._on_map)
 
     def _build_form(self) -> None:
-        padding_options = {"padx": 10, "pady": 6}
-
-        tk.Label(self, text="Ping target (hostname or IP)").grid(row=0, column=0, sticky="w", **padding_options)
-        self.target_entry = tk.Entry(self, width=40)
-        self.target_entry.insert(0, DEFAULT_TARGET)
-        self.target_entry.grid(row=0, column=1, sticky="we", **padding_options)
-
-        tk.Label(self, text="Ping interval (seconds)").grid(row=1, column=0, sticky="w", **padding_options)
-        self.ping_interval_entry = tk.Entry(self, width=10)
-        self.ping_interval_entry.insert(0, str(DEFAULT_PING_INTERVAL))
-        self.ping_interval_entry.grid(row=1, column=1, sticky="w", **padding_options)
-
-        tk.Label(self, text="Ping timeout (seconds)").grid(row=2, column=0, sticky="w", **padding_options)
-        self.ping_timeout_entry = tk.Entry(self, width=10)
-        self.ping_timeout_entry.insert(0, str(DEFAULT_PING_TIMEOUT))
-        self.ping_timeout_entry.grid(row=2, column=1, sticky="w", **padding_options)
-
-        tk.Label(self, text="Speed check interval (seconds)").grid(row=3, column=0, sticky="w", **padding_options)
-        self.speed_interval_entry = tk.Entry(self, width=10)
-        self.speed_interval_entry.insert(0, str(DEFAULT_SPEED_INTERVAL))
-        self.speed_interval_entry.grid(row=3, column=1, sticky="w", **padding_options)
-
-        tk.Label(self, text="Speed test duration (seconds)").grid(row=4, column=0, sticky="w", **padding_options)
-        self.speed_duration_entry = tk.Entry(self, width=10)
-        self.speed_duration_entry.insert(0, str(DEFAULT_SPEED_DURATION))
-        self.speed_duration_entry.grid(row=4, column=1, sticky="w", **padding_options)
-
-        tk.Label(self, text="Speed download URL").grid(row=5, column=0, sticky="w", **padding_options)
-        self.speed_url_entry = tk.Entry(self, width=40)
-        self.speed_url_entry.insert(0, DEFAULT_SPEED_URL)
-        self.speed_url_entry.grid(row=5, column=1, sticky="we", **padding_options)
-
-        button_frame = tk.Frame(self)
-        button_frame.grid(row=6, column=0, columnspan=2, **padding_options)
-        self.start_button = tk.Button(button_frame, text="Start monitoring", command=self._start_monitor)
+        # Each field takes two grid rows: the entry, then a red error label that stays
+        # hidden (and so takes no space) while the value parses.
+        for index, (text, name, width, default, parse, error) in enumerate(FORM_FIELDS):
+            row = index * 2
+            ttk.Label(self, text=text).grid(row=row, column=0, sticky="w", **PAD)
+            var = tk.StringVar(value=default)
+            entry = ttk.Entry(self, width=width, textvariable=var)
+            entry.grid(row=row, column=1, sticky="we" if width > 10 else "w", **PAD)
+            setattr(self, f"{name}_var", var)
+            setattr(self, f"{name}_entry", entry)
+            if parse is not None:
+                self._add_validation(row + 1, var, parse, error)
+
+        button_frame = ttk.Frame(self)
+        button_frame.grid(row=len(FORM_FIELDS) * 2, column=0, columnspan=2, **PAD)
+        self.start_button = ttk.Button(button_frame, text="Start monitoring", command=self._start_monitor)
         self.start_button.grid(row=0, column=0, padx=8)
-        self.stop_button = tk.Button(button_frame, text="Stop", command=self._stop_monitor, state=tk.DISABLED)
+        self.stop_button = ttk.Button(button_frame, text="Stop", command=self._stop_monitor, state=tk.DISABLED)
         self.stop_button.grid(row=0, column=1, padx=8)
 
-        self.status_label = tk.Label(self, text="Idle", anchor="w", justify="left")
-        self.status_label.grid(row=7, column=0, columnspan=2, sticky="we", **padding_options)
+        # One label per field, each bound to its own StringVar: setting a variable
+        # only redraws the label that displays it.
+        status_frame = ttk.Frame(self)
+        status_frame.grid(row=len(FORM_FIELDS) * 2 + 1, column=0, columnspan=2, sticky="we", **PAD)
+        self.status_vars: Dict[str, tk.StringVar] = {}
+        for row, field in enumerate(STATUS_FIELDS):
+            var = tk.StringVar(value="")
+            ttk.Label(status_frame, textvariable=var, anchor="w", justify="left").grid(row=row, column=0, sticky="w")
+            self.status_vars[field] = var
+        self._show_idle()
+
+    def _add_validation(self, row: int, var: tk.StringVar, parse: Callable[[str], object], message: str) -> None:
+        error_label = ttk.Label(self, text=message, foreground="red")
+        error_label.grid(row=row, column=1, sticky="w", padx=10)
+        error_label.grid_remove()
+        var.trace_add("write", lambda *_: self._validate_field(var, parse, error_label))
+
+    def _validate_field(self, var: tk.StringVar, parse: Callable[[str], object], error_label: ttk.Label) -> None:
+        try:
+            parse(var.get())
+        except ValueError:
+            self._invalid_fields.add(str(var))
+            error_label.grid()
+        else:
+            self._invalid_fields.discard(str(var))
+            error_label.grid_remove()
+        self._form_valid = not self._invalid_fields
 
     def _start_monitor(self) -> None:
-        if self.monitor_thread and self.monitor_thread.is_alive():
+        if self._monitor_future and not self._monitor_future.done():
             return
 
-        try:
-            target = self.target_entry.get().strip()
-            ping_interval = float(self.ping_interval_entry.get())
-            ping_timeout = float(self.ping_timeout_entry.get())
-            speed_interval = float(self.speed_interval_entry.get())
-            speed_duration = float(self.speed_duration_entry.get())
-            speed_url = self.speed_url_entry.get().strip() or None
-        except ValueError:
-            messagebox.showerror("Invalid input", "Please enter numeric values for intervals/timeouts.")
+        # The inline validators have already parsed every field on each edit.
+        if not self._form_valid:
             return
+        settings = {
+            keyword: max(lower, _parse_seconds(getattr(self, var_name).get()))
+            for keyword, var_name, lower in MONITOR_SETTINGS
+        }
+        ui_refresh_ms = _parse_milliseconds(self.ui_refresh_var.get())
 
-        if not target:
-            messagebox.showerror("Missing target", "Please enter a hostname or IP to ping.")
-            return
+        # Imported on first start so the window appears before asyncio and the
+        # networking stack load.
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        from monitoring_service import MonitoringService
 
         self.monitor = MonitoringService(
-            target=target,
-            ping_interval=max(0.2, ping_interval),
-            ping_timeout=max(0.2, ping_timeout),
-            speed_interval=max(5.0, speed_interval),
-            speed_blob_url=speed_url,
-            speed_test_duration=max(0.0, speed_duration),
+            target=_parse_target(self.target_var.get()),
+            speed_blob_url=self.speed_url_var.get().strip() or None,
             consecutive_failure_threshold=3,
+            event_queue=self._events,
+            **settings,
         )
-
-        self.monitor_thread = threading.Thread(target=self._run_monitor, daemon=True)
-        self.monitor_thread.start()
+        self._ui_refresh_ms = min(5000, max(100, ui_refresh_ms))
+        self._last_version = -1
+
+        # A single executor worker hosts the monitor's event loop. The run() task is created
+        # before the loop starts so a stop request can never be scheduled ahead of it.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitor")
+        self._monitor_loop = asyncio.new_event_loop()
+        task = self._monitor_loop.create_task(self.monitor.run())
+        self._monitor_future = self._executor.submit(self._run_monitor, self._monitor_loop, task)
+        self._monitor_future.add_done_callback(self._on_monitor_done)
+        self._folder_line = f"Session folder: {self.monitor.platform.sessions_directory()}"
         self._set_running_state(True)
+        self._show_ping_counts()
+        self._set_status_field("speed", "Last speed: pending first sample")
         self._schedule_status_update()
 
-    def _run_monitor(self) -> None:
-        if not self.monitor:
+    @staticmethod
+    def _run_monitor(loop: "asyncio.AbstractEventLoop", task: "asyncio.Task[None]") -> None:
+        import asyncio
+
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(task)
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            # If run() raised, a stop_async() task scheduled from the Tk thread may still
+            # be pending; cancel and drain it so closing the loop does not destroy it.
+            try:
+                pending = asyncio.all_tasks(loop)
+                while pending:
+                    for leftover in pending:
+                        leftover.cancel()
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                    pending = asyncio.all_tasks(loop)
+            finally:
+                loop.close()
+
+    def _on_monitor_done(self, future: "Future[None]") -> None:
+        # Runs on the executor thread: hand failures over to the Tk thread.
+        if future.cancelled() or future.exception() is None:
             return
-        self.monitor.start()
+        try:
+            self.after(0, self._on_monitor_error, future.exception())
+        except (RuntimeError, tk.TclError):
+            # The window is already gone; nothing left to report to.
+            pass
+
+    def _on_monitor_error(self, exc: BaseException) -> None:
+        from tkinter import messagebox
+
+        self._stop_monitor()
+        messagebox.showerror("Monitoring stopped", f"Monitoring stopped unexpectedly: {exc}")
+
+    def _request_monitor_stop(self) -> None:
+        """Signal the monitor to stop without waiting; its run() finishes once the session is persisted."""
+        loop = self._monitor_loop
+        if not self.monitor or not loop or loop.is_closed():
+            # No loop, or run() already finished (e.g. it failed): nothing to stop.
+            return
+        import asyncio
+
+        monitor = self.monitor
+        try:
+            # Create the stop coroutine on the loop itself, so a loop that winds down
+            # before running the callback leaves no never-awaited coroutine behind.
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(monitor.stop_async()))
+        except RuntimeError:
+            # The loop closed after the check above.
+            pass
 
     def _stop_monitor(self) -> None:
         if not self.monitor:
             return
-        self.monitor.stop()
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1)
-        self.monitor_thread = None
+        self._request_monitor_stop()
+        self.stop_button.config(state=tk.DISABLED)
+        self._poll_monitor_done()
+
+    def _poll_monitor_done(self) -> None:
+        # Poll instead of waiting so the window stays responsive while the session is saved.
+        if self._monitor_future and not self._monitor_future.done():
+            self.after(100, self._poll_monitor_done)
+            return
+        self._monitor_future = None
+        self._monitor_loop = None
         self.monitor = None
+        self._events = queue.Queue()
+        self._pending_session = None
+        self._pending_speed = None
+        self._pings_dirty = False
+        self._folder_line = None
         self._set_running_state(False)
 
     def _set_running_state(self, running: bool) -> None:
@@ -132,49 +275,111 @@ class MonitorApp(tk.Tk):
             self.after_cancel(self._status_updater)
             self._status_updater = None
         if not running:
-            self.status_label.config(text=self._build_status_text())
+            self._show_idle()
 
     def _schedule_status_update(self) -> None:
-        self.status_label.config(text=self._build_status_text())
-        self._status_updater = self.after(1000, self._schedule_status_update)
+        # Re-arm first so the cadence does not drift by however long the update takes.
+        self._status_updater = self.after(self._ui_refresh_ms, self._on_status_timer)
+        self._drain_events()
+
+    def _on_status_timer(self) -> None:
+        # Defer the widget work until Tk is idle so it never preempts typing or redraws.
+        self._status_updater = self.after_idle(self._schedule_status_update)
+
+    def _on_unmap(self, event: tk.Event) -> None:
+        # Bindings on the root also fire for its children; only react to the window itself.
+        if event.widget is not self or self.state() not in ("iconic", "withdrawn"):
+            return
+        # Keep ticking so the event queue stays drained (and bounded), but leave the
+        # widgets alone until the window is shown again.
+        self._status_suspended = True
+
+    def _on_map(self, event: tk.Event) -> None:
+        if event.widget is not self or not self._status_suspended:
+            return
+        self._status_suspended = False
+        if self.monitor:
+            # Everything collected while hidden is shown in one update.
+            self._apply_pending_updates()
+
+    def _set_status_field(self, field: str, text: str) -> None:
+        # Compare against our own cache rather than var.get() to avoid a Tcl round-trip.
+        if self._status_texts.get(field) != text:
+            self.status_vars[field].set(text)
+            self._status_texts[field] = text
 
-    def _build_status_text(self) -> str:
+    def _show_idle(self) -> None:
+        self._set_status_field("session", "Idle")
+        for field in STATUS_FIELDS[1:]:
+            self._set_status_field(field, "")
+
+    def _drain_events(self) -> None:
         if not self.monitor:
-            return "Idle"
-
-        uptime_ratio = 0.0
-        if self.monitor.total_pings:
-            uptime_ratio = (self.monitor.success_pings / self.monitor.total_pings) * 100.0
-
-        lines = [
-            f"Session started: {self._format_time(self.monitor.session_started_at)}",
-            f"Session folder: {self.monitor.platform.sessions_directory()}",
-            f"Pings: {self.monitor.total_pings} (success {self.monitor.success_pings}, failed {self.monitor.failed_pings})",
-            f"Uptime: {uptime_ratio:.1f}%",
-        ]
-        if self.monitor.recorder.speeds:
-            latest_speed = self.monitor.recorder.speeds[-1]
-            lines.append(
-                f"Last speed: {latest_speed.direction} {latest_speed.throughput_mbps:.1f} Mbps "
-                f"at {self._format_time(latest_speed.timestamp)}"
+            return
+        # Every event is queued before its version bump, so an unchanged version means an empty queue.
+        version = self.monitor.version
+        if version == self._last_version:
+            return
+        self._last_version = version
+
+        # Collapse everything the monitor pushed since the last tick into one update
+        # per label; nothing is redrawn while the connection is quiet.
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == "ping":
+                self._pings_dirty = True
+            elif kind == "speed":
+                self._pending_speed = event
+            elif kind == "session":
+                self._pending_session = event[1]
+        if not self._status_suspended:
+            self._apply_pending_updates()
+
+    def _apply_pending_updates(self) -> None:
+        if self._pending_session is not None:
+            self._set_status_field("session", f"Session started: {self._format_time(self._pending_session)}")
+            self._set_status_field("folder", self._folder_line or "")
+            self._pending_session = None
+        if self._pings_dirty:
+            self._show_ping_counts()
+            self._pings_dirty = False
+        if self._pending_speed is not None:
+            _, direction, throughput_mbps, timestamp = self._pending_speed
+            self._set_status_field(
+                "speed",
+                f"Last speed: {direction} {throughput_mbps:.1f} Mbps at {self._format_time(timestamp)}",
             )
-        else:
-            lines.append("Last speed: pending first sample")
+            self._pending_speed = None
 
-        return "\n".join(lines)
+    def _show_ping_counts(self) -> None:
+        if not self.monitor:
+            return
+        # One locked read: the counters always agree with each other.
+        snap = self.monitor.snapshot()
+        self._set_status_field(
+            "pings",
+            f"Pings: {snap.total_pings} (success {snap.success_pings}, failed {snap.failed_pings})",
+        )
+        self._set_status_field("uptime", f"Uptime: {snap.uptime_str}")
 
     def _on_close(self) -> None:
-        if self.monitor:
-            self.monitor.stop()
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1)
+        # Close the window at once; the executor worker is joined at interpreter exit,
+        # so the session is still saved after the window is gone.
+        self._request_monitor_stop()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
         self.destroy()
 
     @staticmethod
     def _format_time(value: Optional[datetime]) -> str:
         if value is None:
             return "not started"
-        return value.strftime("%Y-%m-%d %H:%M:%S UTC")
+        # isoformat() is a C fast path; strftime() has to parse its format string on every call.
+        return f"{value.replace(microsecond=0).isoformat(sep=' ')} UTC"
 
 
 def main() -> None: